@@ -1,44 +1,114 @@
 #!/usr/bin/env python3
 """
-Demo OPTIMIZADO que garantiza mostrar los beneficios del journaling
+Demo OPTIMIZADO que compara un mismo fallo con y sin recuperación por journaling
 """
 
+import argparse
+import contextlib
+import cProfile
+import io
 import random
 import sys
 import os
-import time
+import pstats
+from dataclasses import dataclass
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from src.virtual_disk import VirtualDisk
+from src.virtual_disk import (VirtualDisk, BlockStatus, CHECKSUM_ALGORITHMS,
+                              DEFAULT_CHECKSUM_ALGORITHM)
 from src.journaling_fs import JournalingFileSystem
-from src.crash_simulator import CrashSimulator
 from src.integrity_checker import IntegrityChecker
 
-def create_test_scenario(disk_size_mb=2, file_count=5):
+# Archivos de prueba con tamaños específicos para usar bloques predecibles.
+# Nada de esto depende del disco, así que nombres y contenidos se construyen
+# una sola vez al importar y se comparten entre escenarios y pruebas.
+_FILE_SIZES = (4000, 6000, 3000, 5000, 7000)
+_PAYLOAD_PATTERN = b"Archivo de prueba X con datos importantes "
+_PAYLOAD_TEMPLATE = (_PAYLOAD_PATTERN * (max(_FILE_SIZES) // len(_PAYLOAD_PATTERN) + 1))
+_PAYLOADS = tuple(_PAYLOAD_TEMPLATE[:size] for size in _FILE_SIZES)
+_FILENAMES = tuple(f"test_{i}.dat" for i in range(len(_FILE_SIZES)))
+
+# Plantilla del resumen de resultados de cada escenario
+_RESULTS_TEMPLATE = (
+    "\nRESULTADOS {label} JOURNALING:\n"
+    "   • Archivos antes del fallo: {inodes_checked}\n"
+    "   • Archivos después: {inodes_integrity_ok} intactos\n"
+    "   • Tasa de recuperación: {rate:.1f}%\n"
+    "   • Archivos perdidos: {lost}"
+)
+
+def format_results(label, initial_state, final_state):
+    """Formatea el resumen de un escenario con la plantilla común"""
+    checked = initial_state['inodes_checked']
+    intact = final_state['inodes_integrity_ok']
+    return _RESULTS_TEMPLATE.format_map({
+        "label": label,
+        "inodes_checked": checked,
+        "inodes_integrity_ok": intact,
+        "rate": intact / checked * 100,
+        "lost": checked - intact,
+    })
+
+# Generador propio del demo con semilla fija: ejecuciones reproducibles
+_RNG = random.Random(0xC0FFEE)
+
+@dataclass(frozen=True)
+class DemoConfig:
+    """Parámetros compartidos por los escenarios del demo"""
+    disk_size_mb: int = 2
+    file_count: int = 4
+    corruption_percentage: float = 0.3
+    checksum_algorithm: str = DEFAULT_CHECKSUM_ALGORITHM
+
+class _Section:
+    """Acumula la salida de una sección del demo y la escribe de una sola vez"""
+
+    def __enter__(self):
+        self._buffer = io.StringIO()
+        self._redirect = contextlib.redirect_stdout(self._buffer)
+        self._redirect.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._redirect.__exit__(*exc_info)
+        sys.stdout.write(self._buffer.getvalue())
+        sys.stdout.flush()
+        return False
+
+def create_test_scenario(disk_size_mb=2, file_count=5, checksum_algorithm=DEFAULT_CHECKSUM_ALGORITHM):
     """Crea un escenario de prueba controlado"""
-    disk = VirtualDisk(size_mb=disk_size_mb, block_size_kb=4)
+    disk = VirtualDisk(size_mb=disk_size_mb, block_size_kb=4,
+                       checksum_algorithm=checksum_algorithm)
     fs = JournalingFileSystem(disk, journal_enabled=True)
     
-    # Crear archivos de tamaños específicos para usar bloques predecibles
-    file_sizes = [4000, 6000, 3000, 5000, 7000]  # Tamaños variados
     created_files = []
     
     print("Creando archivos de prueba...")
-    for i in range(min(file_count, len(file_sizes))):
-        data = f"Archivo de prueba {i} con datos importantes ".encode() * (file_sizes[i] // 40)
-        filename = f"test_{i}.dat"
-        if fs.create_file(filename, data):
+    for filename, data in zip(_FILENAMES[:file_count], _PAYLOADS):
+        inode_id = fs.create_file(filename, data)
+        if inode_id is not None:
             created_files.append({
                 'filename': filename,
-                'inode_id': len(disk.inodes),
+                'inode_id': inode_id,
                 'size': len(data),
-                'blocks': disk.inodes[len(disk.inodes)].blocks if len(disk.inodes) in disk.inodes else []
+                'blocks': list(disk.inodes[inode_id].blocks)
             })
             print(f"   {filename}: {len(data)} bytes, {len(created_files[-1]['blocks'])} bloques")
     
     return disk, fs, created_files
 
+def snapshot_scenario(disk, fs):
+    """Captura el estado del disco y del journal de un escenario ya poblado"""
+    return disk.snapshot(), list(fs.journal), fs.current_transaction_id
+
+def restore_scenario(disk, fs, state):
+    """Devuelve disco y journal al estado capturado sin crear objetos nuevos"""
+    disk_state, journal, transaction_id = state
+    disk.restore(disk_state)
+    fs.journal = list(journal)
+    fs.current_transaction_id = transaction_id
+
 def simulate_targeted_crash(disk, corruption_percentage=0.1):
     """
     Simula un fallo que corrompe solo algunos archivos específicos
@@ -46,188 +116,224 @@ def simulate_targeted_crash(disk, corruption_percentage=0.1):
     """
     print(f"\nSimulando fallo dirigido ({corruption_percentage*100}% de corrupción)...")
     
-    used_blocks = [i for i, status in enumerate(disk.block_status) 
-                  if status.name == "USED"]
+    used_blocks = disk.blocks_with_status(BlockStatus.USED)
     
     if not used_blocks:
         print("   No hay bloques usados")
-        return 0
+        return set()
     
     # Corromper solo un subconjunto de bloques
     blocks_to_corrupt = max(1, int(len(used_blocks) * corruption_percentage))
-    corrupted_blocks = random.sample(used_blocks, blocks_to_corrupt)
+    corrupted_blocks = _RNG.sample(used_blocks, blocks_to_corrupt)
     
-    for block_num in corrupted_blocks:
-        disk.mark_corrupted(block_num)
+    disk.mark_corrupted_many(corrupted_blocks)
     
     print(f"   {len(corrupted_blocks)} bloques corruptos de {len(used_blocks)} usados")
     
     # Identificar archivos afectados
-    affected_files = set()
-    for inode_id, inode in disk.inodes.items():
-        for block_num in corrupted_blocks:
-            if block_num in inode.blocks:
-                affected_files.add(inode_id)
-                break
+    affected_files = disk.inodes_for_blocks(corrupted_blocks)
     
     print(f"   Archivos afectados: {len(affected_files)} de {len(disk.inodes)}")
-    return len(affected_files)
+    return affected_files
 
-def run_optimized_comparison():
-    """Comparación optimizada que garantiza mostrar beneficios"""
-    print("=" * 70)
-    print("DEMO OPTIMIZADO - Beneficios del Journaling")
-    print("=" * 70)
+def run_optimized_comparison(config=DemoConfig()):
+    """
+    Comparación optimizada de ambos escenarios frente al mismo fallo.
+    Retorna los conteos crudos (archivos verificados e intactos, sin y con
+    journaling) y la mejora en la tasa de recuperación en puntos porcentuales
+    """
+    with _Section():
+        print("=" * 70)
+        print("DEMO OPTIMIZADO - Beneficios del Journaling")
+        print("=" * 70)
+        
+        # Los archivos de prueba se crean una sola vez: el escenario 2 reutiliza
+        # el mismo disco restaurado al estado inicial y ambos fallos usan la
+        # misma semilla, de modo que se corrompen exactamente los mismos bloques
+        disk, fs, test_files = create_test_scenario(config.disk_size_mb, config.file_count,
+                                                    config.checksum_algorithm)
+        base_state = snapshot_scenario(disk, fs)
+        crash_seed = _RNG.randrange(2**32)
     
     # Escenario 1: Sin Journaling
-    print("\nESCENARIO 1: SIN JOURNALING (Vulnerable)")
-    print("-" * 50)
-    
-    disk_no_journal, fs_no_journal, files_no_journal = create_test_scenario(2, 4)
-    
-    # Crear algunos archivos adicionales sin journaling
-    for i in range(2):
-        data = f"Datos críticos sin backup {i}".encode() * 100
-        fs_no_journal.create_file(f"critical_{i}.dat", data)
-    
-    # Verificar estado inicial
-    checker = IntegrityChecker(disk_no_journal)
-    initial_state = checker.comprehensive_integrity_check()
-    print(f"Estado inicial: {initial_state['inodes_integrity_ok']}/{initial_state['inodes_checked']} archivos intactos")
-    
-    # Simular fallo moderado
-    affected_no_journal = simulate_targeted_crash(disk_no_journal, 0.3)
-    
-    # Verificar estado después del fallo
-    final_state_no_journal = checker.comprehensive_integrity_check()
-    recovery_no_journal = fs_no_journal.recover_from_journal()
-    
-    print(f"\nRESULTADOS SIN JOURNALING:")
-    print(f"   • Archivos antes del fallo: {initial_state['inodes_checked']}")
-    print(f"   • Archivos después: {final_state_no_journal['inodes_integrity_ok']} intactos")
-    print(f"   • Tasa de recuperación: {(final_state_no_journal['inodes_integrity_ok']/initial_state['inodes_checked']*100):.1f}%")
-    print(f"   • Archivos perdidos: {initial_state['inodes_checked'] - final_state_no_journal['inodes_integrity_ok']}")
+    with _Section():
+        print("\nESCENARIO 1: SIN JOURNALING (Vulnerable)")
+        print("-" * 50)
+        
+        # Crear algunos archivos adicionales sin journaling
+        for i in range(2):
+            data = f"Datos críticos sin backup {i}".encode() * 100
+            fs.create_file(f"critical_{i}.dat", data)
+        
+        # Verificar estado inicial
+        checker = IntegrityChecker(disk)
+        initial_state = checker.comprehensive_integrity_check()
+        print(f"Estado inicial: {initial_state['inodes_integrity_ok']}/{initial_state['inodes_checked']} archivos intactos")
+        
+        # Simular fallo moderado
+        _RNG.seed(crash_seed)
+        affected_no_journal = simulate_targeted_crash(disk, config.corruption_percentage)
+        checker.invalidate(affected_no_journal)
+        
+        # Verificar estado después del fallo
+        final_state_no_journal = checker.comprehensive_integrity_check()
+        recovery_no_journal = fs.recover_from_journal()
+        
+        print(format_results("SIN", initial_state, final_state_no_journal))
     
     # Escenario 2: Con Journaling
-    print("\nESCENARIO 2: CON JOURNALING (Protegido)")
-    print("-" * 50)
-    
-    disk_with_journal, fs_with_journal, files_with_journal = create_test_scenario(2, 4)
-    
-    # Crear algunos archivos adicionales CON journaling
-    for i in range(2):
-        data = f"Datos críticos con journaling {i}".encode() * 100
-        fs_with_journal.create_file(f"critical_journal_{i}.dat", data)
-    
-    # Verificar estado inicial
-    checker_journal = IntegrityChecker(disk_with_journal)
-    initial_state_journal = checker_journal.comprehensive_integrity_check()
-    print(f"Estado inicial: {initial_state_journal['inodes_integrity_ok']}/{initial_state_journal['inodes_checked']} archivos intactos")
-    print(f"   Entradas en journal: {len(fs_with_journal.journal)}")
-    
-    # Simular el MISMO fallo moderado
-    affected_with_journal = simulate_targeted_crash(disk_with_journal, 0.3)
-    
-    # AQUÍ ESTÁ LA MAGIA: Recuperación con journaling
-    print("\nINICIANDO RECUPERACIÓN CON JOURNALING...")
-    recovery_stats = fs_with_journal.recover_from_journal()
-    
-    # Verificar estado después de la recuperación
-    final_state_with_journal = checker_journal.comprehensive_integrity_check()
-    
-    print(f"\nRESULTADOS CON JOURNALING:")
-    print(f"   • Archivos antes del fallo: {initial_state_journal['inodes_checked']}")
-    print(f"   • Archivos después: {final_state_with_journal['inodes_integrity_ok']} intactos")
-    print(f"   • Tasa de recuperación: {(final_state_with_journal['inodes_integrity_ok']/initial_state_journal['inodes_checked']*100):.1f}%")
-    print(f"   • Archivos perdidos: {initial_state_journal['inodes_checked'] - final_state_with_journal['inodes_integrity_ok']}")
-    print(f"   • Operaciones recuperadas del journal: {recovery_stats['recovered']}")
+    with _Section():
+        print("\nESCENARIO 2: CON JOURNALING (Protegido)")
+        print("-" * 50)
+        
+        restore_scenario(disk, fs, base_state)
+        
+        # Crear algunos archivos adicionales CON journaling
+        for i in range(2):
+            data = f"Datos críticos con journaling {i}".encode() * 100
+            fs.create_file(f"critical_journal_{i}.dat", data)
+        
+        # Verificar estado inicial
+        checker_journal = IntegrityChecker(disk)
+        initial_state_journal = checker_journal.comprehensive_integrity_check()
+        print(f"Estado inicial: {initial_state_journal['inodes_integrity_ok']}/{initial_state_journal['inodes_checked']} archivos intactos")
+        print(f"   Entradas en journal: {len(fs.journal)}")
+        
+        # Simular el MISMO fallo moderado
+        _RNG.seed(crash_seed)
+        affected_with_journal = simulate_targeted_crash(disk, config.corruption_percentage)
+        checker_journal.invalidate(affected_with_journal)
+        
+        # AQUÍ ESTÁ LA MAGIA: Recuperación con journaling
+        print("\nINICIANDO RECUPERACIÓN CON JOURNALING...")
+        recovery_stats = fs.recover_from_journal()
+        
+        # Verificar estado después de la recuperación
+        final_state_with_journal = checker_journal.comprehensive_integrity_check()
+        
+        print(format_results("CON", initial_state_journal, final_state_with_journal))
+        print(f"   • Operaciones recuperadas del journal: {recovery_stats['recovered']}")
     
     # Comparación final
-    print("\n" + "COMPARACIÓN FINAL" + "\n" + "=" * 50)
-    
-    recovery_rate_no_journal = (final_state_no_journal['inodes_integrity_ok'] / 
-                               initial_state['inodes_checked'] * 100) if initial_state['inodes_checked'] > 0 else 0
-    
-    recovery_rate_with_journal = (final_state_with_journal['inodes_integrity_ok'] / 
-                                 initial_state_journal['inodes_checked'] * 100) if initial_state_journal['inodes_checked'] > 0 else 0
-    
-    print(f"Sin Journaling: {recovery_rate_no_journal:.1f}% de recuperación")
-    print(f"Con Journaling: {recovery_rate_with_journal:.1f}% de recuperación")
-    
-    improvement = recovery_rate_with_journal - recovery_rate_no_journal
-    
-    if improvement > 0:
-        print(f"¡BENEFICIO DEMOSTRADO! Mejora: +{improvement:.1f}%")
-    else:
-        print(f" En este escenario no hubo mejora. Ejecuta nuevamente.")
-    
-    # Mostrar cómo el journaling ayuda
-    if recovery_stats['pending_operations']:
-        print(f"\nDETECCIÓN DEL JOURNAL:")
-        print(f"   • El journal identificó {len(recovery_stats['pending_operations'])} operaciones pendientes")
-        print(f"   • Esto permite completar operaciones interrumpidas")
-    
-    return improvement > 0
+    with _Section():
+        print("\n" + "COMPARACIÓN FINAL" + "\n" + "=" * 50)
+        
+        recovery_rate_no_journal = (final_state_no_journal['inodes_integrity_ok'] / 
+                                   initial_state['inodes_checked'] * 100) if initial_state['inodes_checked'] > 0 else 0
+        
+        recovery_rate_with_journal = (final_state_with_journal['inodes_integrity_ok'] / 
+                                     initial_state_journal['inodes_checked'] * 100) if initial_state_journal['inodes_checked'] > 0 else 0
+        
+        print(f"Sin Journaling: {recovery_rate_no_journal:.1f}% de recuperación")
+        print(f"Con Journaling: {recovery_rate_with_journal:.1f}% de recuperación")
+        
+        improvement = recovery_rate_with_journal - recovery_rate_no_journal
+        
+        if improvement > 0:
+            print(f"¡BENEFICIO DEMOSTRADO! Mejora: +{improvement:.1f}%")
+        else:
+            print(" Con el mismo fallo en ambos escenarios no hubo diferencia en la recuperación")
+        
+        # Mostrar cómo el journaling ayuda
+        if recovery_stats['pending_operations']:
+            print(f"\nDETECCIÓN DEL JOURNAL:")
+            print(f"   • El journal identificó {len(recovery_stats['pending_operations'])} operaciones pendientes")
+            print(f"   • Esto permite completar operaciones interrumpidas")
+    
+    return {
+        "files_checked": (initial_state['inodes_checked'], initial_state_journal['inodes_checked']),
+        "files_intact": (final_state_no_journal['inodes_integrity_ok'],
+                         final_state_with_journal['inodes_integrity_ok']),
+        "improvement": improvement,
+    }
 
-def demonstrate_journaling_workflow():
+def demonstrate_journaling_workflow(config=DemoConfig()):
     """Demuestra el flujo completo del journaling"""
-    print("\n" + "FLUJO COMPLETO DEL JOURNALING" + "\n" + "=" * 50)
-    
-    disk = VirtualDisk(size_mb=1, block_size_kb=4)
-    fs = JournalingFileSystem(disk, journal_enabled=True)
-    
-    print("1. Creando archivos con journaling activado...")
-    files_data = [
-        ("documento.txt", b"Contenido importante del documento"),
-        ("config.cfg", b"configuracion=valor\nusuario=admin"),
-        ("datos.bin", b"DATA" * 100)
-    ]
-    
-    for filename, data in files_data:
-        fs.create_file(filename, data)
-        print(f"   {filename}: {len(data)} bytes")
-    
-    print(f"\n2. Journal actual: {len(fs.journal)} entradas")
-    for i, entry in enumerate(fs.journal[-3:]):  # Mostrar últimas 3 entradas
-        print(f"   • {entry.entry_type.value}: {entry.data.get('filename', 'checkpoint')}")
-    
-    print("\n3. Simulando fallo del sistema...")
-    # Corromper solo un archivo específico
-    if disk.inodes:
-        first_inode = list(disk.inodes.values())[0]
-        if first_inode.blocks:
-            disk.mark_corrupted(first_inode.blocks[0])
-            print(f"   Bloque {first_inode.blocks[0]} corrupto (afecta {list(disk.inodes.keys())[0]})")
-    
-    print("\n4. Recuperación post-fallo...")
-    recovery = fs.recover_from_journal()
-    checker = IntegrityChecker(disk)
-    state = checker.comprehensive_integrity_check()
-    
-    print(f"   • Archivos recuperados: {state['inodes_integrity_ok']}/{state['inodes_checked']}")
-    print(f"   • Journal procesado: {recovery['recovered']} operaciones")
-    
-    if state['inodes_integrity_ok'] > 0:
-        print("\n¡RECUPERACIÓN EXITOSA!")
-        print("   El journaling permitió recuperar la consistencia del sistema")
-    else:
-        print("\nRecuperación parcial")
-        print("   Algunos datos se perdieron, pero el sistema sigue consistente")
+    with _Section():
+        print("\n" + "FLUJO COMPLETO DEL JOURNALING" + "\n" + "=" * 50)
+        
+        disk = VirtualDisk(size_mb=1, block_size_kb=4, checksum_algorithm=config.checksum_algorithm)
+        fs = JournalingFileSystem(disk, journal_enabled=True)
+        
+        print("1. Creando archivos con journaling activado...")
+        files_data = [
+            ("documento.txt", b"Contenido importante del documento"),
+            ("config.cfg", b"configuracion=valor\nusuario=admin"),
+            ("datos.bin", b"DATA" * 100)
+        ]
+        
+        for filename, data in files_data:
+            fs.create_file(filename, data)
+            print(f"   {filename}: {len(data)} bytes")
+        
+        print(f"\n2. Journal actual: {len(fs.journal)} entradas")
+        for i, entry in enumerate(fs.journal[-3:]):  # Mostrar últimas 3 entradas
+            print(f"   • {entry.entry_type.value}: {entry.data.get('filename', 'checkpoint')}")
+        
+        print("\n3. Simulando fallo del sistema...")
+        # Corromper solo un archivo específico
+        if disk.inodes:
+            first_inode = list(disk.inodes.values())[0]
+            if first_inode.blocks:
+                disk.mark_corrupted(first_inode.blocks[0])
+                print(f"   Bloque {first_inode.blocks[0]} corrupto (afecta {list(disk.inodes.keys())[0]})")
+        
+        print("\n4. Recuperación post-fallo...")
+        recovery = fs.recover_from_journal()
+        checker = IntegrityChecker(disk)
+        state = checker.comprehensive_integrity_check()
+        
+        print(f"   • Archivos recuperados: {state['inodes_integrity_ok']}/{state['inodes_checked']}")
+        print(f"   • Journal procesado: {recovery['recovered']} operaciones")
+        
+        if state['inodes_integrity_ok'] > 0:
+            print("\n¡RECUPERACIÓN EXITOSA!")
+            print("   El journaling permitió recuperar la consistencia del sistema")
+        else:
+            print("\nRecuperación parcial")
+            print("   Algunos datos se perdieron, pero el sistema sigue consistente")
 
 if __name__ == "__main__":
-    print("DEMO OPTIMIZADO - Journaling File Systems")
-    print("   Este demo está CONFIGURADO para mostrar claramente")
-    print("   los beneficios del journaling\n")
-    
-    # Ejecutar comparación optimizada
-    success = run_optimized_comparison()
-    
-    # Demostrar flujo completo
-    demonstrate_journaling_workflow()
-    
-    if success:
-        print("\n¡OBJETIVO CUMPLIDO!")
-        print("   Se demostraron claramente los beneficios del journaling")
-    else:
-        print("\nConsejo: Ejecuta este demo varias veces")
-        print("   La aleatoriedad ocasional puede afectar los resultados")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hash", choices=sorted(CHECKSUM_ALGORITHMS), default=DEFAULT_CHECKSUM_ALGORITHM,
+                        help="Algoritmo de checksum usado por el disco virtual")
+    parser.add_argument("--profile", nargs="?", const="profile.out", metavar="ARCHIVO",
+                        help="Ejecutar bajo cProfile, mostrar las 30 funciones más costosas en stderr "
+                             "y guardar las estadísticas en ARCHIVO (profile.out por defecto)")
+    parser.add_argument("--seed", type=int, default=0xC0FFEE,
+                        help="Semilla de los fallos simulados (misma semilla, mismos resultados)")
+    parser.add_argument("--quiet", action="store_true",
+                        help="Acumular toda la salida en memoria y escribirla de una sola vez al final")
+    args = parser.parse_args()
+    _RNG.seed(args.seed)
+    config = DemoConfig(checksum_algorithm=args.hash)
+    
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    
+    # Con --quiet toda la salida se acumula en memoria y se escribe de una vez al final
+    output = io.StringIO()
+    redirect = contextlib.redirect_stdout(output) if args.quiet else contextlib.nullcontext()
+    with redirect:
+        print("DEMO OPTIMIZADO - Journaling File Systems")
+        print("   Ambos escenarios parten del mismo disco y sufren")
+        print("   exactamente el mismo fallo\n")
+        
+        # Ejecutar comparación optimizada
+        comparison = run_optimized_comparison(config)
+        
+        # Demostrar flujo completo
+        demonstrate_journaling_workflow(config)
+        
+        if comparison["improvement"] > 0:
+            print("\n¡OBJETIVO CUMPLIDO!")
+            print("   Se demostraron claramente los beneficios del journaling")
+    if args.quiet:
+        sys.stdout.write(output.getvalue())
+        sys.stdout.flush()
+    
+    if args.profile:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(30)
@@ -1,60 +1,84 @@
 import json
 import time
 import random
-from typing import List, Dict, Any
-from .virtual_disk import VirtualDisk
-from .journaling_fs import JournalingFileSystem, JournalEntryType
+from typing import List, Dict, Any, Optional
+from .virtual_disk import VirtualDisk, BlockStatus
+from .journaling_fs import JournalingFileSystem, JournalEntryType, DurabilityLevel
+
+# Contenidos de prueba construidos una sola vez; cada archivo toma un slice
+_PAYLOAD_TEMPLATE = b"Datos de prueba para archivo X " * 250  # 7750 bytes >= tamaño máximo
+_CRITICAL_DATA = b"Critical operation data that might be interrupted by system crash " * 80
 
 class CrashSimulator:
     """
     Simula fallos del sistema y cortes de energía
     """
     
-    def __init__(self, disk: VirtualDisk, fs: JournalingFileSystem):
+    def __init__(self, disk: VirtualDisk, fs: JournalingFileSystem, seed: Optional[int] = None,
+                 verbose: bool = False):
         self.disk = disk
         self.fs = fs
+        # En modo verbose se detalla cada operación y se pausa entre ellas
+        self.verbose = verbose
+        # Generador propio: con la misma semilla, dos simuladores producen
+        # exactamente la misma secuencia de operaciones y fallos
+        self.rng = random.Random(seed)
         self.crash_points = []
         
-    def simulate_operation_sequence(self, operations: int, crash_probability: float = 0.3):
+    def simulate_operation_sequence(self, operations: int, crash_probability: float = 0.3,
+                                    commit_batch: int = 1):
         """
-        Simula una secuencia de operaciones con posibilidad de fallo
+        Simula una secuencia de operaciones con posibilidad de fallo.
+        Las entradas del journal se confirman en lotes de commit_batch: lotes
+        mayores ahorran confirmaciones, pero un fallo pierde el lote pendiente
         """
         print(f"Iniciando simulación de {operations} operaciones...")
         print(f"Probabilidad de fallo: {crash_probability*100}%")
         
         successful_operations = 0
         
-        for i in range(operations):
-            # Simular diferentes tipos de operaciones
-            op_type = random.choice(["create", "create", "create", "write"])  # Más creación
-            
-            try:
-                if op_type == "create":
-                    filename = f"test_file_{i}.dat"
-                    # Archivos más grandes para usar más bloques
-                    file_size = random.randint(3000, 7000)  # Aumentamos el tamaño
-                    file_data = f"Datos de prueba para archivo {i} ".encode() * (file_size // 30)
-                    success = self.fs.create_file(filename, file_data)
-                    
-                    if success:
-                        successful_operations += 1
-                        print(f"Operación {i+1}: Archivo '{filename}' creado ({len(file_data)} bytes)")
-                    else:
-                        print(f"Operación {i+1}: Falló creación de '{filename}'")
+        # Sortear de antemano el tipo de cada operación (más creación) y las tiradas de fallo
+        rng = self.rng
+        op_types = rng.choices(("create", "write"), weights=(3, 1), k=operations)
+        crash_rolls = [rng.random() for _ in range(operations)]
+        
+        # Las entradas del journal se confirman por lotes en lugar de una a una
+        with self.fs.group_commit(max_batch=commit_batch):
+            for i, op_type in enumerate(op_types):
+                try:
+                    if op_type == "create":
+                        filename = f"test_file_{i}.dat"
+                        # Archivos más grandes para usar más bloques
+                        file_size = rng.randint(3000, 7000)  # Aumentamos el tamaño
+                        # El número de operación al inicio hace único el checksum de cada archivo
+                        file_data = i.to_bytes(4, "little") + _PAYLOAD_TEMPLATE[:file_size - 4]
+                        inode_id = self.fs.create_file(filename, file_data)
                         
-                # Simular posible fallo del sistema
-                if random.random() < crash_probability:
-                    print(f"\nFALLO DEL SISTEMA SIMULADO en operación {i+1}")
-                    # Corrupción MUY ligera para permitir recuperación
-                    self.simulate_crash(corruption_level=0.02)  # Solo 2% de corrupción
-                    break
+                        if inode_id is not None:
+                            successful_operations += 1
+                            if self.verbose:
+                                print(f"Operación {i+1}: Archivo '{filename}' creado ({len(file_data)} bytes)")
+                        elif self.verbose:
+                            print(f"Operación {i+1}: Falló creación de '{filename}'")
+                            
+                    # Simular posible fallo del sistema
+                    if crash_rolls[i] < crash_probability:
+                        print(f"\nFALLO DEL SISTEMA SIMULADO en operación {i+1}")
+                        # Las entradas del lote aún no confirmadas se pierden con el fallo
+                        lost_entries = self.fs.discard_pending()
+                        if lost_entries:
+                            print(f"Entradas del journal sin confirmar perdidas: {lost_entries}")
+                        # Corrupción MUY ligera para permitir recuperación
+                        self.simulate_crash(corruption_level=0.02)  # Solo 2% de corrupción
+                        break
+                        
+                    # Pequeña pausa entre operaciones para mejor visualización
+                    if self.verbose:
+                        time.sleep(0.1)
                     
-                # Pequeña pausa entre operaciones para mejor visualización
-                time.sleep(0.1)
-                
-            except Exception as e:
-                print(f"Error crítico en operación {i+1}: {e}")
-                break
+                except Exception as e:
+                    print(f"Error crítico en operación {i+1}: {e}")
+                    break
         
         print(f"\nSimulación completada: {successful_operations}/{operations} operaciones exitosas")
         return successful_operations
@@ -63,41 +87,35 @@ class CrashSimulator:
         """
         Simula un fallo del sistema corruptiendo algunos bloques
         """
-        total_blocks = self.disk.total_blocks
+        disk = self.disk
         
-        # Encontrar bloques USED
-        used_blocks = [i for i, status in enumerate(self.disk.block_status) 
-                      if status.name == "USED"]
+        # Contar los bloques USED antes de enumerarlos: sin bloques no hay nada que hacer
+        used_count = disk.status_map.count(BlockStatus.USED.value)
         
-        if not used_blocks:
+        if used_count == 0:
             print("No hay bloques usados para corromper")
             return
             
         # Calcular cuántos bloques corromper basado en los bloques USED, no totales
-        blocks_to_corrupt = max(1, min(3, int(len(used_blocks) * corruption_level * 5)))  # Más conservador
+        # (entre 1 y 3, nunca más de los que hay)
+        blocks_to_corrupt = min(used_count, max(1, min(3, int(used_count * corruption_level * 5))))  # Más conservador
         
-        print(f"Corrompiendo {blocks_to_corrupt} de {len(used_blocks)} bloques usados...")
+        print(f"Corrompiendo {blocks_to_corrupt} de {used_count} bloques usados...")
         
         # Seleccionar bloques USED aleatorios para corromper
-        corrupted_blocks = random.sample(used_blocks, min(blocks_to_corrupt, len(used_blocks)))
+        used_blocks = disk.blocks_with_status(BlockStatus.USED)
+        corrupted_blocks = self.rng.sample(used_blocks, blocks_to_corrupt)
         
-        for block_num in corrupted_blocks:
-            self.disk.mark_corrupted(block_num)
+        disk.mark_corrupted_many(corrupted_blocks)
             
         print(f"Fallo simulado: {len(corrupted_blocks)} bloques de datos corruptos")
         
         # Información útil para debugging
-        total_used = len(used_blocks)
-        corruption_percentage = (len(corrupted_blocks) / total_used * 100) if total_used > 0 else 0
+        corruption_percentage = len(corrupted_blocks) / used_count * 100
         print(f"Estadísticas: {corruption_percentage:.1f}% de bloques usados afectados")
         
         # Información sobre archivos afectados
-        affected_inodes = set()
-        for inode_id, inode in self.disk.inodes.items():
-            for block_num in corrupted_blocks:
-                if block_num in inode.blocks:
-                    affected_inodes.add(inode_id)
-                    break
+        affected_inodes = disk.inodes_for_blocks(corrupted_blocks)
         
         print(f"Archivos potencialmente afectados: {len(affected_inodes)}")
     
@@ -110,7 +128,7 @@ class CrashSimulator:
         # Fase 1: Iniciar operación crítica
         transaction_id = self.fs.begin_transaction()
         # Archivo más grande para usar múltiples bloques
-        test_data = b"Critical operation data that might be interrupted by system crash " * 80
+        test_data = _CRITICAL_DATA
         
         if self.fs.journal_enabled:
             self.fs.journal_operation(
@@ -120,7 +138,9 @@ class CrashSimulator:
                     "size": len(test_data),
                     "data_checksum": self.fs.disk.calculate_checksum(test_data),
                     "transaction_id": transaction_id
-                }
+                },
+                # El registro debe sobrevivir al fallo que se simula a continuación
+                durability=DurabilityLevel.STRICT
             )
             print("Journal actualizado - operación registrada")
         
@@ -135,8 +155,8 @@ class CrashSimulator:
     def get_crash_statistics(self) -> Dict[str, any]:
         """Estadísticas de los fallos simulados"""
         total_blocks = self.disk.total_blocks
-        corrupted_blocks = sum(1 for s in self.disk.block_status if s.name == "CORRUPTED")
-        used_blocks = sum(1 for s in self.disk.block_status if s.name == "USED")
+        corrupted_blocks = self.disk.status_map.count(BlockStatus.CORRUPTED.value)
+        used_blocks = self.disk.status_map.count(BlockStatus.USED.value)
         
         return {
             "total_blocks": total_blocks,
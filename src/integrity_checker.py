@@ -1,4 +1,5 @@
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Iterable, Optional, Tuple
 from .virtual_disk import VirtualDisk, Inode, BlockStatus
 
 class IntegrityChecker:
@@ -6,8 +7,59 @@ class IntegrityChecker:
     Verifica la integridad del sistema de archivos después de un fallo
     """
     
-    def __init__(self, disk: VirtualDisk):
+    def __init__(self, disk: VirtualDisk, max_workers: int = 1):
         self.disk = disk
+        # Con max_workers > 1 los checksums pendientes se calculan en hilos:
+        # hashlib y zlib liberan el GIL con buffers grandes, así que solo
+        # compensa con muchos archivos o archivos grandes
+        self.max_workers = max_workers
+        # Checksum de los datos leídos en la última verificación de cada inodo,
+        # junto con la clave del inodo en ese momento (ver _cache_key).
+        # El estado de los bloques se revisa siempre; solo se evita re-leer y
+        # re-calcular el checksum de archivos que no cambiaron. Cualquier
+        # escritura en el disco (incluidos restore() y reset()) cambia su
+        # generación y descarta todos los resultados memorizados.
+        self._data_checksums: Dict[int, Tuple[tuple, str]] = {}
+        self._generation = disk.generation
+        
+    def invalidate(self, inode_ids: Iterable[int]):
+        """Descarta los resultados memorizados de los inodos indicados"""
+        for inode_id in inode_ids:
+            self._data_checksums.pop(inode_id, None)
+            
+    @staticmethod
+    def _cache_key(inode: Inode) -> tuple:
+        """Clave con la que se memoriza el checksum de los datos de un inodo"""
+        return (inode.modified, inode.size, inode.checksum, tuple(inode.blocks))
+        
+    def _cached_checksum(self, inode: Inode) -> Optional[str]:
+        """Checksum memorizado del inodo, si sigue siendo válido"""
+        if self.disk.generation != self._generation:
+            self._data_checksums.clear()
+            self._generation = self.disk.generation
+        cached = self._data_checksums.get(inode.id)
+        if cached and cached[0] == self._cache_key(inode):
+            return cached[1]
+        return None
+        
+    def _compute_checksum(self, inode: Inode) -> Optional[str]:
+        """Lee y calcula el checksum de los datos del inodo, memorizándolo"""
+        file_chunks = self._read_inode_chunks(inode)
+        if file_chunks is None:
+            return None
+        checksum = self.disk.calculate_checksum_chunks(file_chunks)
+        self._data_checksums[inode.id] = (self._cache_key(inode), checksum)
+        return checksum
+        
+    def _prefetch_checksums(self):
+        """Calcula en paralelo los checksums de los inodos sin resultado memorizado"""
+        stale = [inode for inode in self.disk.inodes.values()
+                 if self._cached_checksum(inode) is None]
+        if len(stale) < 2:
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Cada hilo escribe una clave distinta del diccionario
+            list(executor.map(self._compute_checksum, stale))
         
     def comprehensive_integrity_check(self) -> Dict[str, Any]:
         """
@@ -28,36 +80,34 @@ class IntegrityChecker:
             "block_status_summary": {}
         }
         
-        # Verificar estado de bloques
-        for status in self.disk.block_status:
-            status_name = status.name
-            results["block_status_summary"][status_name] = results["block_status_summary"].get(status_name, 0) + 1
-            
-            if status == BlockStatus.FREE:
-                results["free_blocks"] += 1
-            elif status == BlockStatus.USED:
-                results["used_blocks"] += 1
-            elif status == BlockStatus.CORRUPTED:
-                results["corrupted_blocks"] += 1
+        # Verificar estado de bloques: un conteo en C por estado sobre el mapa de estados
+        status_map = self.disk.status_map
+        counts = {status: status_map.count(status.value) for status in BlockStatus}
+        results["free_blocks"] = counts[BlockStatus.FREE]
+        results["used_blocks"] = counts[BlockStatus.USED]
+        results["corrupted_blocks"] = counts[BlockStatus.CORRUPTED]
+        # El resumen lista los estados presentes en orden de primera aparición
+        present = sorted((status for status in BlockStatus if counts[status]),
+                         key=lambda status: status_map.find(status.value))
+        results["block_status_summary"] = {status.name: counts[status] for status in present}
         
         # Verificar integridad de inodos
+        if self.max_workers > 1:
+            self._prefetch_checksums()
         for inode_id, inode in self.disk.inodes.items():
             results["inodes_checked"] += 1
             
             # Verificar si todos los bloques del inodo están accesibles
-            corrupted_blocks_in_inode = [
-                block_num for block_num in inode.blocks 
-                if (0 <= block_num < self.disk.total_blocks and
-                    self.disk.block_status[block_num] == BlockStatus.CORRUPTED)
-            ]
+            corrupted_count = self.disk.count_status(inode.blocks, BlockStatus.CORRUPTED)
             
-            blocks_accessible = len(corrupted_blocks_in_inode) == 0
+            blocks_accessible = corrupted_count == 0
             
             if blocks_accessible:
-                # Leer y verificar checksum
-                file_data = self._read_inode_data(inode)
-                if file_data is not None:
-                    current_checksum = self.disk.calculate_checksum(file_data)
+                # Leer y verificar checksum (reutilizando el de la verificación previa)
+                current_checksum = self._cached_checksum(inode)
+                if current_checksum is None:
+                    current_checksum = self._compute_checksum(inode)
+                if current_checksum is not None:
                     if current_checksum == inode.checksum:
                         results["inodes_integrity_ok"] += 1
                         results["recoverable_files"].append({
@@ -89,16 +139,16 @@ class IntegrityChecker:
             else:
                 results["inodes_integrity_failed"] += 1
                 # Verificar si es parcialmente recuperable
-                recoverable = len(corrupted_blocks_in_inode) < len(inode.blocks)
+                recoverable = corrupted_count < len(inode.blocks)
                 results["corrupted_files"].append({
                     "inode_id": inode_id,
                     "status": "CORRUPTED_BLOCKS",
-                    "corrupted_blocks_count": len(corrupted_blocks_in_inode),
+                    "corrupted_blocks_count": corrupted_count,
                     "total_blocks": len(inode.blocks),
                     "recoverable": recoverable
                 })
                 if recoverable:
-                    print(f"   Inodo {inode_id}: Parcialmente corrupto ({len(corrupted_blocks_in_inode)}/{len(inode.blocks)} bloques)")
+                    print(f"   Inodo {inode_id}: Parcialmente corrupto ({corrupted_count}/{len(inode.blocks)} bloques)")
                 else:
                     print(f"   Inodo {inode_id}: Completamente corrupto")
         
@@ -106,24 +156,15 @@ class IntegrityChecker:
         print(f"Verificación completada: {results['inodes_integrity_ok']}/{results['inodes_checked']} archivos intactos ({recovery_rate:.1f}%)")
         return results
     
-    def _read_inode_data(self, inode: Inode) -> bytes:
-        """Intenta leer datos de un inodo"""
-        try:
-            data_blocks = []
-            for block_num in inode.blocks:
-                if (0 <= block_num < self.disk.total_blocks and 
-                    self.disk.block_status[block_num] != BlockStatus.CORRUPTED):
-                    block_data = self.disk.read_block(block_num)
-                    if block_data:
-                        data_blocks.append(block_data)
-                    else:
-                        return None
-                else:
-                    return None  # Bloque corrupto o fuera de rango
-            return b''.join(data_blocks)[:inode.size]
-        except Exception as e:
-            print(f"Error leyendo inodo {inode.id}: {e}")
-            return None
+    def _read_inode_chunks(self, inode: Inode) -> Optional[List[memoryview]]:
+        """
+        Intenta leer los datos de un inodo como vistas sobre sus bloques, sin
+        copiarlos: una vista por tramo de bloques consecutivos, para que el
+        checksum procese trozos grandes en cada llamada
+        """
+        if self.disk.count_status(inode.blocks, BlockStatus.CORRUPTED):
+            return None  # Bloque corrupto
+        return self.disk.data_views(inode.blocks, inode.size)  # None si hay bloques fuera de rango
     
     def compare_fs_states(self, before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
         """
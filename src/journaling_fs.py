@@ -1,11 +1,17 @@
 import hashlib
 import json
 import time
+from collections import Counter
+from contextlib import contextmanager
 from enum import Enum
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from dataclasses import dataclass
 from .virtual_disk import VirtualDisk, Inode
 
+# Codificador reutilizable con la forma canónica (claves ordenadas) de las
+# entradas; json.dumps con argumentos crea un codificador nuevo en cada llamada
+_JOURNAL_ENCODER = json.JSONEncoder(sort_keys=True)
+
 class JournalEntryType(Enum):
     FILE_CREATE = "CREATE"
     FILE_WRITE = "WRITE"
@@ -13,6 +19,12 @@ class JournalEntryType(Enum):
     METADATA_UPDATE = "METADATA"
     CHECKPOINT = "CHECKPOINT"
 
+class DurabilityLevel(Enum):
+    # Dentro de un group_commit se confirma junto con el resto del lote
+    BUFFERED = "BUFFERED"
+    # Se confirma de inmediato, junto con todo lo pendiente del lote
+    STRICT = "STRICT"
+
 @dataclass
 class JournalEntry:
     transaction_id: int
@@ -32,6 +44,9 @@ class JournalingFileSystem:
         self.journal: List[JournalEntry] = []
         self.current_transaction_id = 1
         self.checkpoint_interval = 5  # Operaciones entre checkpoints
+        # Entradas pendientes de confirmar dentro de un group_commit (None fuera de él)
+        self._pending: Optional[List[JournalEntry]] = None
+        self._max_batch = 1
         
     def begin_transaction(self) -> int:
         """Inicia una nueva transacción"""
@@ -39,8 +54,12 @@ class JournalingFileSystem:
         self.current_transaction_id += 1
         return transaction_id
         
-    def journal_operation(self, entry_type: JournalEntryType, operation_data: Dict[str, Any]):
-        """Registra una operación en el journal"""
+    def journal_operation(self, entry_type: JournalEntryType, operation_data: Dict[str, Any],
+                          durability: DurabilityLevel = DurabilityLevel.BUFFERED):
+        """
+        Registra una operación en el journal. Fuera de un group_commit toda
+        entrada se confirma de inmediato; dentro, solo las STRICT
+        """
         if not self.journal_enabled:
             return
             
@@ -51,23 +70,77 @@ class JournalingFileSystem:
             data=operation_data,
             checksum=self._calculate_journal_checksum(operation_data)
         )
+        
+        if self._pending is None:
+            self._append_entry(entry)
+            return
+            
+        self._pending.append(entry)
+        if durability is DurabilityLevel.STRICT or len(self._pending) >= self._max_batch:
+            self.commit_pending()
+    
+    @contextmanager
+    def group_commit(self, max_batch: int = 8):
+        """
+        Agrupa las entradas del journal generadas dentro del bloque y las
+        confirma juntas: cada max_batch entradas y al salir del bloque.
+        Anidado dentro de otro group_commit, se une al lote ya abierto
+        """
+        if self._pending is not None:
+            yield self
+            return
+        self._pending = []
+        self._max_batch = max_batch
+        try:
+            yield self
+        finally:
+            self.commit_pending()
+            self._pending = None
+            
+    def commit_pending(self):
+        """Confirma en el journal las entradas acumuladas por group_commit"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        for entry in pending:
+            self._append_entry(entry)
+            
+    def discard_pending(self) -> int:
+        """
+        Descarta las entradas aún no confirmadas (se pierden en un fallo).
+        Retorna cuántas se descartaron
+        """
+        if not self._pending:
+            return 0
+        discarded = len(self._pending)
+        self._pending = []
+        return discarded
+        
+    def _append_entry(self, entry: JournalEntry):
+        """Añade una entrada confirmada al journal"""
         self.journal.append(entry)
         
         # Crear checkpoint periódicamente
         if len(self.journal) % self.checkpoint_interval == 0:
             self._create_checkpoint()
     
-    def create_file(self, filename: str, data: bytes) -> bool:
-        """Crea un archivo con journaling"""
+    def create_file(self, filename: str, data: bytes) -> Optional[int]:
+        """
+        Crea un archivo con journaling.
+        Retorna el id del inodo creado, o None si la operación falla
+        """
         transaction_id = self.begin_transaction()
         
         try:
+            # Un único cálculo sirve para el journal y para el inodo
+            data_checksum = self.disk.calculate_checksum(data)
+            
             # Fase 1: Journaling - Registrar la operación
             if self.journal_enabled:
                 self.journal_operation(JournalEntryType.FILE_CREATE, {
                     "filename": filename,
                     "size": len(data),
-                    "data_checksum": self.disk.calculate_checksum(data),
+                    "data_checksum": data_checksum,
                     "transaction_id": transaction_id
                 })
             
@@ -78,23 +151,19 @@ class JournalingFileSystem:
             if not free_blocks:
                 raise Exception("No hay bloques libres suficientes")
                 
-            # Escribir datos en bloques
-            for i, block_num in enumerate(free_blocks):
-                start = i * self.disk.block_size
-                end = start + self.disk.block_size
-                block_data = data[start:end]
-                self.disk.write_block(block_num, block_data)
+            # Escribir datos en bloques (una sola copia si son consecutivos)
+            self.disk.write_blocks(free_blocks, data)
             
             # Crear inodo
             inode = Inode(
                 id=self.disk.next_inode_id,
                 size=len(data),
                 blocks=free_blocks,
-                checksum=self.disk.calculate_checksum(data),
+                checksum=data_checksum,
                 created=time.time(),
                 modified=time.time()
             )
-            self.disk.inodes[inode.id] = inode
+            self.disk.add_inode(inode)
             self.disk.next_inode_id += 1
             
             # Registrar metadata en journal
@@ -107,11 +176,21 @@ class JournalingFileSystem:
                 })
             
             print(f" Archivo '{filename}' creado exitosamente (inodo: {inode.id})")
-            return True
+            return inode.id
             
         except Exception as e:
             print(f" Error creando archivo '{filename}': {e}")
-            return False
+            return None
+            
+    def create_files_batch(self, files: Iterable[Tuple[str, bytes]],
+                           max_batch: int = 8) -> List[Optional[int]]:
+        """
+        Crea varios archivos confirmando sus entradas del journal en lotes
+        de max_batch (ver group_commit). Retorna el id de inodo de cada
+        archivo, o None si su creación falló
+        """
+        with self.group_commit(max_batch=max_batch):
+            return [self.create_file(filename, data) for filename, data in files]
     
     def read_file(self, inode_id: int) -> Optional[bytes]:
         """Lee un archivo verificando integridad"""
@@ -120,17 +199,12 @@ class JournalingFileSystem:
             return None
             
         inode = self.disk.inodes[inode_id]
-        data_blocks = []
-        
-        for block_num in inode.blocks:
-            block_data = self.disk.read_block(block_num)
-            if block_data:
-                data_blocks.append(block_data)
-            else:
-                print(f"  Bloque {block_num} corrupto o no accesible")
-                return None
-                
-        file_data = b''.join(data_blocks)[:inode.size]
+        # Lectura directa de los bytes del archivo, sin lista intermedia de bloques
+        file_data = self.disk.read_blocks(inode.blocks, inode.size)
+        if file_data is None:
+            block_num = next(b for b in inode.blocks if self.disk.read_block(b) is None)
+            print(f"  Bloque {block_num} corrupto o no accesible")
+            return None
         
         # Verificar integridad
         current_checksum = self.disk.calculate_checksum(file_data)
@@ -153,40 +227,72 @@ class JournalingFileSystem:
         
         print("Iniciando recuperación desde journal...")
         
+        # Checksums de los inodos existentes, calculados una sola vez
+        existing_checksums = {inode.checksum for inode in self.disk.inodes.values()}
+        
+        # Solo se revisan las creaciones posteriores al último checkpoint más
+        # las que este registró como aún abiertas; las anteriores ya terminaron
+        _, creates = self._creates_since_checkpoint()
+        
         # Buscar operaciones pendientes (sin metadata confirmada)
-        for entry in self.journal:
-            if entry.entry_type == JournalEntryType.FILE_CREATE:
-                filename = entry.data["filename"]
-                data_checksum = entry.data["data_checksum"]
-                
-                # Verificar si existe un inodo con este checksum
-                file_exists = False
-                for inode in self.disk.inodes.values():
-                    if inode.checksum == data_checksum:
-                        file_exists = True
-                        break
-                
-                if not file_exists:
-                    recovery_stats["pending_operations"].append({
-                        "type": "FILE_CREATE_PENDING",
-                        "filename": filename,
-                        "transaction_id": entry.transaction_id
-                    })
-                    recovery_stats["errors"] += 1
-                    print(f"Operación pendiente: Crear archivo '{filename}'")
+        for create in creates:
+            filename = create["filename"]
+            
+            # Verificar si existe un inodo con este checksum
+            if create["data_checksum"] not in existing_checksums:
+                recovery_stats["pending_operations"].append({
+                    "type": "FILE_CREATE_PENDING",
+                    "filename": filename,
+                    "transaction_id": create["transaction_id"]
+                })
+                recovery_stats["errors"] += 1
+                print(f"Operación pendiente: Crear archivo '{filename}'")
         
         recovery_stats["recovered"] = len(self.journal) - recovery_stats["errors"]
         print(f"Recuperación completada: {recovery_stats['recovered']} operaciones verificadas")
         
         return recovery_stats
     
+    def _last_checkpoint_index(self) -> int:
+        """Posición del último checkpoint del journal, o -1 si no hay ninguno"""
+        for index in range(len(self.journal) - 1, -1, -1):
+            if self.journal[index].entry_type == JournalEntryType.CHECKPOINT:
+                return index
+        return -1
+        
+    def _creates_since_checkpoint(self) -> Tuple[List[JournalEntry], List[Dict[str, Any]]]:
+        """
+        Retorna las entradas posteriores al último checkpoint y las creaciones
+        a revisar: las que el checkpoint dejó abiertas más las nuevas
+        """
+        last_checkpoint = self._last_checkpoint_index()
+        entries = self.journal[last_checkpoint + 1:]
+        creates = list(self.journal[last_checkpoint].data["open_creates"]) if last_checkpoint >= 0 else []
+        creates.extend({
+            "filename": entry.data["filename"],
+            "data_checksum": entry.data["data_checksum"],
+            "transaction_id": entry.transaction_id,
+            "operation_id": entry.data.get("transaction_id")
+        } for entry in entries if entry.entry_type == JournalEntryType.FILE_CREATE)
+        return entries, creates
+        
+    def _open_creates(self) -> List[Dict[str, Any]]:
+        """Creaciones cuya metadata aún no se ha confirmado en el journal"""
+        entries, creates = self._creates_since_checkpoint()
+        completed = {entry.data.get("transaction_id") for entry in entries
+                     if entry.entry_type == JournalEntryType.METADATA_UPDATE}
+        return [create for create in creates
+                if create["operation_id"] is None or create["operation_id"] not in completed]
+    
     def _create_checkpoint(self):
         """Crea un punto de control en el journal"""
         checkpoint_data = {
             "timestamp": time.time(),
             "active_inodes": list(self.disk.inodes.keys()),
             "total_operations": len(self.journal),
-            "transaction_id": self.current_transaction_id
+            "transaction_id": self.current_transaction_id,
+            # Permite a la recuperación empezar desde este checkpoint
+            "open_creates": self._open_creates()
         }
         
         checkpoint_entry = JournalEntry(
@@ -201,15 +307,12 @@ class JournalingFileSystem:
     
     def _calculate_journal_checksum(self, data: Dict[str, Any]) -> str:
         """Calcula checksum para entradas del journal"""
-        data_str = json.dumps(data, sort_keys=True)
-        return hashlib.sha256(data_str.encode()).hexdigest()
+        data_str = _JOURNAL_ENCODER.encode(data)
+        return hashlib.blake2b(data_str.encode(), digest_size=16).hexdigest()
     
     def get_journal_stats(self) -> Dict[str, Any]:
         """Estadísticas del journal"""
-        entry_types = {}
-        for entry in self.journal:
-            entry_type = entry.entry_type.value
-            entry_types[entry_type] = entry_types.get(entry_type, 0) + 1
+        entry_types = dict(Counter(entry.entry_type.value for entry in self.journal))
             
         return {
             "total_entries": len(self.journal),
@@ -1,15 +1,90 @@
 import os
+import mmap
 import struct
 import hashlib
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+import zlib
+from itertools import compress
+from operator import or_
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Optional, Set
 from enum import Enum
 
+try:
+    import xxhash
+except ImportError:  # Dependencia opcional: solo habilita el algoritmo "xxh3"
+    xxhash = None
+
+try:
+    import google_crc32c
+except ImportError:  # Dependencia opcional: solo habilita el algoritmo "crc32c"
+    google_crc32c = None
+
+def _sha256_chunks(chunks: Iterable[bytes]) -> str:
+    h = hashlib.sha256()
+    for chunk in chunks:
+        h.update(chunk)
+    return h.hexdigest()
+
+def _crc32_chunks(chunks: Iterable[bytes]) -> str:
+    crc = 0
+    for chunk in chunks:
+        crc = zlib.crc32(chunk, crc)
+    return format(crc, "08x")
+
+def _xxh3_chunks(chunks: Iterable[bytes]) -> str:
+    h = xxhash.xxh3_64()
+    for chunk in chunks:
+        h.update(chunk)
+    return h.hexdigest()
+
+def _crc32c_chunks(chunks: Iterable[bytes]) -> str:
+    crc = 0
+    for chunk in chunks:
+        crc = google_crc32c.extend(crc, chunk)
+    return format(crc, "08x")
+
+# Algoritmos de checksum disponibles. Cada uno consume los datos por trozos
+# (sin concatenarlos) y retorna el digest en hexadecimal.
+# Los checksums solo se comparan por igualdad para detectar corrupción, así
+# que el predeterminado es CRC32 (zlib, acelerado por hardware) y no SHA-256.
+DEFAULT_CHECKSUM_ALGORITHM = "crc32"
+CHECKSUM_ALGORITHMS = {
+    "sha256": _sha256_chunks,
+    "crc32": _crc32_chunks,
+}
+if xxhash is not None:
+    CHECKSUM_ALGORITHMS["xxh3"] = _xxh3_chunks
+if google_crc32c is not None:
+    CHECKSUM_ALGORITHMS["crc32c"] = _crc32c_chunks
+
 class BlockStatus(Enum):
     FREE = 0
     USED = 1
     CORRUPTED = 2
 
+# Indexado por el valor del estado: _STATUS_BY_CODE[1] is BlockStatus.USED
+_STATUS_BY_CODE = tuple(BlockStatus)
+
+class BlockStatusView:
+    """
+    Vista de solo lectura sobre el mapa de estados del disco que expone
+    cada bloque como un BlockStatus
+    """
+
+    def __init__(self, status_map: bytearray):
+        self._status_map = status_map
+
+    def __len__(self) -> int:
+        return len(self._status_map)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [_STATUS_BY_CODE[code] for code in self._status_map[index]]
+        return _STATUS_BY_CODE[self._status_map[index]]
+
+    def __iter__(self):
+        return map(_STATUS_BY_CODE.__getitem__, self._status_map)
+
 @dataclass
 class Inode:
     id: int
@@ -24,12 +99,36 @@ class VirtualDisk:
     Simula un disco virtual con bloques de almacenamiento
     """
     
-    def __init__(self, size_mb: int = 10, block_size_kb: int = 4):
+    def __init__(self, size_mb: int = 10, block_size_kb: int = 4,
+                 checksum_algorithm: str = DEFAULT_CHECKSUM_ALGORITHM):
+        if checksum_algorithm not in CHECKSUM_ALGORITHMS:
+            raise ValueError(f"Algoritmo de checksum desconocido: {checksum_algorithm}")
+        self.checksum_algorithm = checksum_algorithm
+        self._checksum = CHECKSUM_ALGORITHMS[checksum_algorithm]
         self.block_size = block_size_kb * 1024  # 4KB blocks
         self.total_blocks = (size_mb * 1024 * 1024) // self.block_size
-        self.blocks = [bytearray(self.block_size) for _ in range(self.total_blocks)]
-        self.block_status = [BlockStatus.FREE] * self.total_blocks
+        # Todos los bloques en un único buffer contiguo; el bloque n ocupa
+        # storage[n * block_size:(n + 1) * block_size]. Es un mapeo anónimo:
+        # el sistema operativo entrega páginas en cero al tocarlas por primera
+        # vez, así que crear el disco no reserva ni rellena toda su memoria
+        storage_size = self.total_blocks * self.block_size
+        self.storage = mmap.mmap(-1, storage_size) if storage_size else bytearray()
+        self._view = memoryview(self.storage)
+        # Página de ceros compartida para rellenar bloques sin reservar memoria
+        self._zero_page = memoryview(bytes(self.block_size))
+        # Un byte por bloque con el valor de BlockStatus; block_status es la
+        # vista con enums para el resto del código
+        self.status_map = bytearray(self.total_blocks)
+        self.block_status = BlockStatusView(self.status_map)
+        # Todos los bloques anteriores a este índice están ocupados o corruptos:
+        # ningún bloque vuelve a quedar libre salvo con restore() o reset()
+        self._free_hint = 0
+        # Se incrementa con cada cambio en los datos de los bloques; permite a
+        # quien memoriza checksums saber si los datos pudieron cambiar
+        self.generation = 0
         self.inodes: Dict[int, Inode] = {}
+        # Índice inverso bloque -> inodo propietario
+        self.block_to_inode: Dict[int, int] = {}
         self.next_inode_id = 1
         
     def write_block(self, block_num: int, data: bytes) -> bool:
@@ -40,41 +139,214 @@ class VirtualDisk:
         if len(data) > self.block_size:
             data = data[:self.block_size]
             
-        self.blocks[block_num][:] = data.ljust(self.block_size, b'\x00')
-        self.block_status[block_num] = BlockStatus.USED
+        # Copia directa sobre el bloque (acepta bytes o memoryview) y relleno
+        # con ceros del resto, sin construir un bloque temporal completo
+        start = block_num * self.block_size
+        end = start + self.block_size
+        size = len(data)
+        self._view[start:start + size] = data
+        if size < self.block_size:
+            self._view[start + size:end] = self._zero_page[size:]
+        self.status_map[block_num] = BlockStatus.USED.value
+        self.generation += 1
+        return True
+        
+    def write_blocks(self, block_nums: List[int], data: bytes) -> bool:
+        """
+        Escribe datos repartidos en varios bloques, block_size bytes por
+        bloque y en el orden indicado
+        """
+        if not all(0 <= block_num < self.total_blocks for block_num in block_nums):
+            return False
+        if not block_nums:
+            return True
+            
+        block_size = self.block_size
+        view = memoryview(data)[:len(block_nums) * block_size]
+        first = block_nums[0]
+        if block_nums == list(range(first, first + len(block_nums))):
+            # Bloques consecutivos: una sola copia sobre el buffer contiguo
+            start = first * block_size
+            end = start + len(block_nums) * block_size
+            self._view[start:start + len(view)] = view
+            # El relleno con ceros reutiliza la página de ceros, bloque a bloque
+            # por si los datos no alcanzan a cubrir más de un bloque
+            for pad_start in range(start + len(view), end, block_size):
+                pad = min(block_size, end - pad_start)
+                self._view[pad_start:pad_start + pad] = self._zero_page[:pad]
+        else:
+            for i, block_num in enumerate(block_nums):
+                chunk = view[i * block_size:(i + 1) * block_size]
+                start = block_num * block_size
+                self._view[start:start + len(chunk)] = chunk
+                self._view[start + len(chunk):start + block_size] = self._zero_page[len(chunk):]
+                
+        used_code = BlockStatus.USED.value
+        status_map = self.status_map
+        for block_num in block_nums:
+            status_map[block_num] = used_code
+        self.generation += 1
         return True
         
     def read_block(self, block_num: int) -> Optional[bytes]:
         """Lee datos de un bloque específico"""
         if block_num < 0 or block_num >= self.total_blocks:
             return None
-        return bytes(self.blocks[block_num])
+        return bytes(self.block_view(block_num))
+        
+    def read_blocks(self, block_nums: List[int], size: int) -> Optional[bytes]:
+        """Lee los primeros size bytes de los datos repartidos en varios bloques"""
+        views = self.data_views(block_nums, size)
+        if views is None:
+            return None
+        # Con bloques consecutivos hay una sola vista: una sola copia
+        return b"".join(views)
+        
+    def data_views(self, block_nums: List[int], size: int) -> Optional[List[memoryview]]:
+        """
+        Retorna vistas sin copia sobre los primeros size bytes de los datos
+        repartidos en varios bloques: una por cada tramo de bloques consecutivos
+        """
+        if not all(0 <= block_num < self.total_blocks for block_num in block_nums):
+            return None
+        block_size = self.block_size
+        views = []
+        remaining = size
+        run_start = 0
+        for i in range(1, len(block_nums) + 1):
+            # Cerrar el tramo al final de la lista o cuando se rompe la secuencia
+            if i == len(block_nums) or block_nums[i] != block_nums[i - 1] + 1:
+                start = block_nums[run_start] * block_size
+                view = self._view[start:start + min(remaining, (i - run_start) * block_size)]
+                if not view:
+                    break
+                views.append(view)
+                remaining -= len(view)
+                run_start = i
+        return views
+        
+    def block_view(self, block_num: int) -> memoryview:
+        """Retorna una vista sin copia sobre los datos de un bloque"""
+        start = block_num * self.block_size
+        return self._view[start:start + self.block_size]
         
     def mark_corrupted(self, block_num: int):
         """Marca un bloque como corrupto (simulación de fallo)"""
         if 0 <= block_num < self.total_blocks:
-            self.block_status[block_num] = BlockStatus.CORRUPTED
+            self.status_map[block_num] = BlockStatus.CORRUPTED.value
             
+    def mark_corrupted_many(self, block_nums: Iterable[int]):
+        """Marca varios bloques como corruptos en una sola llamada"""
+        status_map = self.status_map
+        corrupted_code = BlockStatus.CORRUPTED.value
+        for block_num in sorted(block_nums):
+            if 0 <= block_num < self.total_blocks:
+                status_map[block_num] = corrupted_code
+                
+    def blocks_with_status(self, status: BlockStatus) -> List[int]:
+        """Retorna los números de bloque que están en el estado indicado"""
+        return list(compress(range(self.total_blocks),
+                             map(status.value.__eq__, self.status_map)))
+
+    def count_status(self, block_nums: List[int], status: BlockStatus) -> int:
+        """Cuenta cuántos de los bloques indicados están en el estado dado"""
+        if not block_nums:
+            return 0
+        first = block_nums[0]
+        if (0 <= first and first + len(block_nums) <= self.total_blocks and
+                block_nums == list(range(first, first + len(block_nums)))):
+            # Bloques consecutivos: un solo conteo en C sobre el tramo del mapa
+            return self.status_map.count(status.value, first, first + len(block_nums))
+        status_map = self.status_map
+        code = status.value
+        return sum(1 for block_num in block_nums
+                   if 0 <= block_num < self.total_blocks and status_map[block_num] == code)
+
+    def add_inode(self, inode: Inode):
+        """Registra un inodo y sus bloques en el índice inverso"""
+        self.inodes[inode.id] = inode
+        for block_num in inode.blocks:
+            self.block_to_inode[block_num] = inode.id
+            
+    def inodes_for_blocks(self, block_nums: Iterable[int]) -> Set[int]:
+        """Retorna los inodos que poseen alguno de los bloques indicados"""
+        block_to_inode = self.block_to_inode
+        return {block_to_inode[b] for b in block_nums if b in block_to_inode}
+
     def get_free_blocks(self, count: int) -> List[int]:
         """Encuentra bloques libres consecutivos"""
         free_blocks = []
-        for i, status in enumerate(self.block_status):
-            if status == BlockStatus.FREE:
-                free_blocks.append(i)
-                if len(free_blocks) == count:
-                    break
+        free_code = BlockStatus.FREE.value
+        # bytearray.find salta en C los bloques ocupados hasta el siguiente libre,
+        # empezando donde terminó la búsqueda anterior
+        find = self.status_map.find
+        block_num = find(free_code, self._free_hint)
+        self._free_hint = block_num if block_num != -1 else self.total_blocks
+        while block_num != -1 and len(free_blocks) < count:
+            free_blocks.append(block_num)
+            block_num = find(free_code, block_num + 1)
         return free_blocks if len(free_blocks) == count else []
         
     def calculate_checksum(self, data: bytes) -> str:
         """Calcula checksum para verificar integridad"""
-        return hashlib.sha256(data).hexdigest()
+        return self._checksum((data,))
+        
+    def calculate_checksum_chunks(self, chunks: Iterable[bytes]) -> str:
+        """Calcula el mismo checksum que calculate_checksum sobre datos dados por trozos"""
+        return self._checksum(chunks)
+        
+    def snapshot(self) -> tuple:
+        """
+        Captura el estado completo del disco (datos, estados e inodos) en un
+        valor opaco que puede pasarse a restore(). Solo se copian los bloques
+        no libres: los libres siempre contienen ceros
+        """
+        blocks = {block_num: bytes(self.block_view(block_num))
+                  for block_num in compress(range(self.total_blocks), self.status_map)}
+        inodes = {inode_id: replace(inode, blocks=list(inode.blocks))
+                  for inode_id, inode in self.inodes.items()}
+        return (blocks, bytes(self.status_map), inodes,
+                dict(self.block_to_inode), self.next_inode_id)
+        
+    def restore(self, snapshot: tuple):
+        """Restaura en sitio un estado capturado con snapshot(), reutilizando los buffers"""
+        blocks, status_map, inodes, block_to_inode, next_inode_id = snapshot
+        # Los bloques libres siempre contienen ceros: basta con reescribir los
+        # bloques ocupados en el disco actual o en la captura (con ceros si la
+        # captura no los tiene), sin tocar las páginas del resto del mapeo
+        block_size = self.block_size
+        for block_num in compress(range(self.total_blocks), map(or_, self.status_map, status_map)):
+            start = block_num * block_size
+            self._view[start:start + block_size] = blocks.get(block_num, self._zero_page)
+        self._free_hint = 0
+        self.generation += 1
+        self.status_map[:] = status_map
+        self.inodes = {inode_id: replace(inode, blocks=list(inode.blocks))
+                       for inode_id, inode in inodes.items()}
+        self.block_to_inode = dict(block_to_inode)
+        self.next_inode_id = next_inode_id
+        
+    def reset(self):
+        """Devuelve el disco a su estado inicial vacío reutilizando los buffers existentes"""
+        # Solo se ponen a cero los bloques no libres (los libres ya lo están),
+        # así que el reinicio no toca las páginas que nunca se usaron
+        block_size = self.block_size
+        for block_num in compress(range(self.total_blocks), self.status_map):
+            start = block_num * block_size
+            self._view[start:start + block_size] = self._zero_page
+        self._free_hint = 0
+        self.generation += 1
+        self.status_map[:] = bytes(self.total_blocks)  # FREE es el código 0
+        self.inodes.clear()
+        self.block_to_inode.clear()
+        self.next_inode_id = 1
         
     def get_disk_stats(self) -> Dict[str, any]:
         """Retorna estadísticas del disco"""
         return {
             "total_blocks": self.total_blocks,
-            "free_blocks": sum(1 for s in self.block_status if s == BlockStatus.FREE),
-            "used_blocks": sum(1 for s in self.block_status if s == BlockStatus.USED),
-            "corrupted_blocks": sum(1 for s in self.block_status if s == BlockStatus.CORRUPTED),
+            "free_blocks": self.status_map.count(BlockStatus.FREE.value),
+            "used_blocks": self.status_map.count(BlockStatus.USED.value),
+            "corrupted_blocks": self.status_map.count(BlockStatus.CORRUPTED.value),
             "total_inodes": len(self.inodes)
         }
\ No newline at end of file
@@ -4,7 +4,7 @@ import os
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from src.virtual_disk import VirtualDisk
+from src.virtual_disk import VirtualDisk, BlockStatus, CHECKSUM_ALGORITHMS
 from src.journaling_fs import JournalingFileSystem
 from src.crash_simulator import CrashSimulator
 from src.integrity_checker import IntegrityChecker
@@ -37,6 +37,37 @@ class TestCrashRecovery(unittest.TestCase):
         self.assertIn('recovered', recovery_stats)
         self.assertIn('inodes_integrity_ok', integrity_report)
         
+    def test_recovery_from_checkpoint(self):
+        """Test de operaciones pendientes anteriores al último checkpoint"""
+        disk = VirtualDisk(size_mb=1)
+        fs = JournalingFileSystem(disk, journal_enabled=True)
+        crash_sim = CrashSimulator(disk, fs, seed=1)
+        
+        # Creación interrumpida antes de varios checkpoints
+        crash_sim.controlled_crash_during_operation("interrupted.dat")
+        for i in range(6):
+            fs.create_file(f"file_{i}.dat", f"File data {i}".encode() * 10)
+        self.assertGreater(fs._last_checkpoint_index(), 0)
+        
+        recovery_stats = fs.recover_from_journal()
+        self.assertEqual([op["filename"] for op in recovery_stats["pending_operations"]],
+                         ["interrupted.dat"])
+        
+    def test_seeded_crash_is_reproducible(self):
+        """Test de reproducibilidad de los fallos con la misma semilla"""
+        corrupted = []
+        for _ in range(2):
+            disk = VirtualDisk(size_mb=1)
+            fs = JournalingFileSystem(disk, journal_enabled=True)
+            for i in range(4):
+                fs.create_file(f"file_{i}.dat", f"File data {i}".encode() * 500)
+            
+            crash_sim = CrashSimulator(disk, fs, seed=42)
+            crash_sim.simulate_crash(corruption_level=0.3)
+            corrupted.append(disk.blocks_with_status(BlockStatus.CORRUPTED))
+        
+        self.assertEqual(corrupted[0], corrupted[1])
+        
     def test_checksum_verification(self):
         """Test de verificación de checksum después de corrupción"""
         disk = VirtualDisk(size_mb=1)
@@ -62,5 +93,64 @@ class TestCrashRecovery(unittest.TestCase):
             corrupted_read = fs.read_file(inode_id)
             # El comportamiento puede variar, pero no debería crashear
 
+    def test_checksum_algorithms(self):
+        """Test de los algoritmos de checksum configurables del disco"""
+        # Incluye los opcionales (xxh3, crc32c) si están instalados
+        for algorithm in sorted(CHECKSUM_ALGORITHMS):
+            disk = VirtualDisk(size_mb=1, checksum_algorithm=algorithm)
+            fs = JournalingFileSystem(disk, journal_enabled=True)
+            fs.create_file("data.bin", b"payload" * 100)
+            # El cálculo por trozos coincide con el de los datos completos
+            self.assertEqual(disk.calculate_checksum_chunks([b"payload" * 40, b"payload" * 60]),
+                             disk.inodes[1].checksum)
+
+            checker = IntegrityChecker(disk)
+            self.assertEqual(checker.comprehensive_integrity_check()['inodes_integrity_ok'], 1)
+
+        with self.assertRaises(ValueError):
+            VirtualDisk(size_mb=1, checksum_algorithm="md5")
+
+    def test_integrity_check_invalidation(self):
+        """Test de la verificación incremental tras cambios en el disco"""
+        disk = VirtualDisk(size_mb=1)
+        fs = JournalingFileSystem(disk, journal_enabled=True)
+        fs.create_file("a.dat", b"A" * 100)
+        fs.create_file("b.dat", b"B" * 100)
+        snapshot = disk.snapshot()
+
+        checker = IntegrityChecker(disk)
+        self.assertEqual(checker.comprehensive_integrity_check()['inodes_integrity_ok'], 2)
+
+        # Sobrescribir los datos de un archivo sin pasar por el filesystem
+        inode = disk.inodes[1]
+        disk.write_block(inode.blocks[0], b"X" * 100)
+
+        results = checker.comprehensive_integrity_check()
+        self.assertEqual(results['inodes_integrity_ok'], 1)
+        self.assertEqual(results['corrupted_files'][0]['status'], "CHECKSUM_MISMATCH")
+
+        # Restaurar el disco descarta el checksum memorizado de los datos alterados
+        disk.restore(snapshot)
+        self.assertEqual(checker.comprehensive_integrity_check()['inodes_integrity_ok'], 2)
+
+        # Un inodo reemplazado (mismo id, otros datos) se verifica de nuevo
+        disk.reset()
+        fs.create_file("c.dat", b"C" * 100)
+        self.assertEqual(checker.comprehensive_integrity_check()['inodes_integrity_ok'], 1)
+
+    def test_parallel_integrity_check(self):
+        """Test de la verificación con checksums calculados en hilos"""
+        disk = VirtualDisk(size_mb=1)
+        fs = JournalingFileSystem(disk, journal_enabled=True)
+        for i in range(6):
+            fs.create_file(f"file_{i}.dat", f"File data {i}".encode() * 500)
+        disk.mark_corrupted(disk.inodes[2].blocks[0])
+        disk.write_block(disk.inodes[4].blocks[0], b"X" * 100)
+
+        sequential = IntegrityChecker(disk).comprehensive_integrity_check()
+        parallel = IntegrityChecker(disk, max_workers=4).comprehensive_integrity_check()
+        self.assertEqual(parallel, sequential)
+        self.assertEqual(parallel['inodes_integrity_ok'], 4)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -4,8 +4,8 @@ import os
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from src.virtual_disk import VirtualDisk
-from src.journaling_fs import JournalingFileSystem, JournalEntryType
+from src.virtual_disk import VirtualDisk, BlockStatus
+from src.journaling_fs import JournalingFileSystem, JournalEntryType, DurabilityLevel
 from src.integrity_checker import IntegrityChecker
 
 class TestJournalingFileSystem(unittest.TestCase):
@@ -37,14 +37,19 @@ class TestJournalingFileSystem(unittest.TestCase):
         self.assertTrue(success)
         self.assertEqual(len(self.fs_no_journal.journal), 0)  # No debe haber entradas
         
+    def test_file_creation_invalid_data(self):
+        """Test que verifica que datos inválidos no lanzan excepción"""
+        self.assertIsNone(self.fs_with_journal.create_file("texto.txt", "hola"))
+        self.assertEqual(len(self.disk.inodes), 0)
+        
     def test_file_read_integrity(self):
         """Test de lectura y verificación de integridad"""
         original_data = b"Original data for integrity test"
-        self.fs_with_journal.create_file("integrity_test.txt", original_data)
+        inode_id = self.fs_with_journal.create_file("integrity_test.txt", original_data)
         
-        # Encontrar el inodo creado
+        # create_file retorna el inodo creado
         self.assertEqual(len(self.disk.inodes), 1)
-        inode_id = list(self.disk.inodes.keys())[0]
+        self.assertIn(inode_id, self.disk.inodes)
         
         # Leer y verificar
         read_data = self.fs_with_journal.read_file(inode_id)
@@ -65,6 +70,47 @@ class TestJournalingFileSystem(unittest.TestCase):
         self.assertIn('errors', recovery_stats)
         self.assertIn('pending_operations', recovery_stats)
         
+    def test_group_commit(self):
+        """Test de confirmación agrupada de entradas del journal"""
+        fs = self.fs_with_journal
+        with fs.group_commit(max_batch=8):
+            fs.create_file("a.txt", b"a")
+            fs.create_file("b.txt", b"b")
+            # Cuatro entradas pendientes, aún no confirmadas
+            self.assertEqual(len(fs.journal), 0)
+        self.assertEqual(len(fs.journal), 4)
+        
+        with fs.group_commit(max_batch=8):
+            fs.create_file("c.txt", b"c")
+            self.assertEqual(fs.discard_pending(), 2)  # Perdidas en un fallo
+        self.assertEqual(len(fs.journal), 4)
+        
+        with fs.group_commit(max_batch=8):
+            fs.journal_operation(JournalEntryType.FILE_WRITE, {"filename": "a.txt"},
+                                 durability=DurabilityLevel.STRICT)
+            self.assertEqual(len(fs.journal), 6)  # Incluye el checkpoint periódico
+        
+        # Un group_commit anidado se une al lote exterior sin descartarlo
+        with fs.group_commit(max_batch=8):
+            fs.create_file("d.txt", b"d")
+            with fs.group_commit(max_batch=8):
+                fs.create_file("e.txt", b"e")
+            self.assertEqual(len(fs.journal), 6)
+            fs.create_file("f.txt", b"f")
+        filenames = [e.data["filename"] for e in fs.journal[6:]
+                     if e.entry_type == JournalEntryType.FILE_CREATE]
+        self.assertEqual(filenames, ["d.txt", "e.txt", "f.txt"])
+        
+    def test_create_files_batch(self):
+        """Test de creación de varios archivos en un lote"""
+        files = [(f"batch_{i}.dat", f"Batch {i}".encode() * 100) for i in range(3)]
+        inode_ids = self.fs_with_journal.create_files_batch(files)
+        
+        self.assertEqual(inode_ids, [1, 2, 3])
+        self.assertEqual(self.fs_with_journal.read_file(3), files[2][1])
+        self.assertIsNone(self.fs_with_journal._pending)  # Lote confirmado al terminar
+        self.assertEqual(len(self.fs_with_journal.journal), 7)  # 6 entradas + checkpoint
+        
     def test_disk_block_management(self):
         """Test de gestión de bloques del disco virtual"""
         # Verificar estado inicial
@@ -80,6 +126,49 @@ class TestJournalingFileSystem(unittest.TestCase):
         stats_after = self.disk.get_disk_stats()
         self.assertGreater(stats_after['used_blocks'], 0)
         
+    def test_block_to_inode_index(self):
+        """Test del índice inverso bloque -> inodo"""
+        self.fs_with_journal.create_file("a.dat", b"A" * 5000)
+        self.fs_with_journal.create_file("b.dat", b"B" * 100)
+        inode_a, inode_b = self.disk.inodes[1], self.disk.inodes[2]
+        
+        self.assertEqual(self.disk.inodes_for_blocks(inode_a.blocks), {1})
+        self.assertEqual(self.disk.inodes_for_blocks([inode_a.blocks[-1], inode_b.blocks[0]]), {1, 2})
+        self.assertEqual(self.disk.inodes_for_blocks([self.disk.total_blocks - 1]), set())
+        
+    def test_disk_snapshot_restore(self):
+        """Test de captura y restauración del estado del disco"""
+        self.fs_with_journal.create_file("base.dat", b"base" * 100)
+        snapshot = self.disk.snapshot()
+        stats_before = self.disk.get_disk_stats()
+        
+        # Modificar el disco después de la captura
+        extra_id = self.fs_with_journal.create_file("extra.dat", b"extra" * 100)
+        extra_block = self.disk.inodes[extra_id].blocks[0]
+        self.disk.mark_corrupted(self.disk.inodes[1].blocks[0])
+        
+        self.disk.restore(snapshot)
+        self.assertEqual(self.disk.get_disk_stats(), stats_before)
+        self.assertEqual(list(self.disk.inodes), [1])
+        self.assertEqual(self.fs_with_journal.read_file(1), b"base" * 100)
+        # Los bloques que la captura no tenía vuelven a quedar en ceros
+        self.assertEqual(self.disk.read_block(extra_block), bytes(self.disk.block_size))
+        
+    def test_disk_reset(self):
+        """Test del reinicio en sitio del disco"""
+        self.fs_with_journal.create_file("a.dat", b"A" * 5000)
+        storage = self.disk.storage
+        
+        self.assertEqual(self.disk.get_free_blocks(1), [2])
+        
+        self.disk.reset()
+        self.assertIs(self.disk.storage, storage)  # Reutiliza los buffers
+        self.assertEqual(self.disk.get_free_blocks(1), [0])  # Los bloques vuelven a estar libres
+        self.assertEqual(self.disk.get_disk_stats()['free_blocks'], self.disk.total_blocks)
+        self.assertEqual(self.disk.read_block(0), bytes(self.disk.block_size))
+        self.assertEqual(self.disk.inodes, {})
+        self.assertEqual(self.fs_with_journal.create_file("b.dat", b"B"), 1)
+        
     def test_integrity_checker(self):
         """Test del verificador de integridad"""
         # Crear algunos archivos
@@ -127,5 +216,53 @@ class TestCrashSimulation(unittest.TestCase):
         self.assertEqual(disk.block_status[4].name, "CORRUPTED")
         self.assertEqual(disk.block_status[0].name, "USED")  # No corrupto
 
+    def test_write_blocks(self):
+        """Test de escritura y lectura de datos repartidos en varios bloques"""
+        disk = VirtualDisk(size_mb=1)
+        data = bytes(range(256)) * 20  # Algo más de un bloque
+        
+        for block_nums in ([3, 4], [7, 5]):
+            self.assertTrue(disk.write_blocks(block_nums, data))
+            self.assertEqual(disk.read_block(block_nums[0]), data[:disk.block_size])
+            self.assertEqual(disk.read_block(block_nums[1]),
+                             data[disk.block_size:].ljust(disk.block_size, b"\x00"))
+        
+            self.assertEqual(disk.read_blocks(block_nums, len(data)), data)
+        
+        self.assertEqual(disk.blocks_with_status(BlockStatus.USED), [3, 4, 5, 7])
+        
+        # Datos más cortos que un bloque: el resto de los bloques queda en ceros
+        self.assertTrue(disk.write_blocks([10, 11, 12], b"\xff" * 3 * disk.block_size))
+        self.assertTrue(disk.write_blocks([10, 11, 12], b"corto"))
+        self.assertEqual(disk.read_blocks([10, 11, 12], 3 * disk.block_size),
+                         b"corto".ljust(3 * disk.block_size, b"\x00"))
+        self.assertFalse(disk.write_blocks([0, disk.total_blocks], data))
+        self.assertIsNone(disk.read_blocks([0, disk.total_blocks], len(data)))
+        
+    def test_blocks_with_status(self):
+        """Test de búsqueda de bloques por estado"""
+        disk = VirtualDisk(size_mb=1)
+
+        for i in range(5):
+            disk.write_block(i, b"test data")
+        disk.mark_corrupted(3)
+
+        self.assertEqual(disk.blocks_with_status(BlockStatus.USED), [0, 1, 2, 4])
+        self.assertEqual(disk.blocks_with_status(BlockStatus.CORRUPTED), [3])
+        self.assertEqual(len(disk.blocks_with_status(BlockStatus.FREE)), disk.total_blocks - 5)
+
+    def test_mark_corrupted_many(self):
+        """Test de corrupción de varios bloques en una llamada"""
+        disk = VirtualDisk(size_mb=1)
+
+        for i in range(5):
+            disk.write_block(i, b"test data")
+        disk.mark_corrupted_many([4, 1, disk.total_blocks])  # Fuera de rango se ignora
+
+        self.assertEqual(disk.blocks_with_status(BlockStatus.CORRUPTED), [1, 4])
+        self.assertEqual(disk.get_disk_stats()['used_blocks'], 3)
+        self.assertEqual(disk.count_status([0, 1, 2, 3, 4], BlockStatus.CORRUPTED), 2)  # Consecutivos
+        self.assertEqual(disk.count_status([4, 0, 1], BlockStatus.CORRUPTED), 2)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file